@@ -8,27 +8,35 @@ Setup:
     2. Copy your API key from https://serpapi.com/manage-api-key
     3. Paste it in SERPAPI_KEY below
     4. Install dependencies:
-           pip install google-search-results pandas openpyxl phonenumbers
+           pip install aiohttp diskcache orjson pandas openpyxl xlsxwriter pyarrow phonenumbers pybloom-live
 
 Run:
     python bangalore_vendor_scraper.py
 
 Each run creates: Bangalore_Vendors_26-Feb-2026.xlsx  (date auto-updates)
-Master file:      Bangalore_Vendors_Master_List.xlsx  (all runs combined, no duplicates)
+Master file:      Bangalore_Vendors_Master_List.parquet  (all runs combined, no duplicates)
+                  + Bangalore_Vendors_Master_List.xlsx as a human-readable view
 """
 
-import time
+import asyncio
+import functools
+import hashlib
+import json
 import re
 import os
+import time
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from typing import Optional
 
+import aiohttp
+import diskcache
+import numpy as np
+import orjson
 import pandas as pd
 import phonenumbers
-from serpapi import GoogleSearch
-from openpyxl import load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from pybloom_live import ScalableBloomFilter
 
 # ─────────────────────────────────────────────
 # CONFIGURATION  <- Edit these values
@@ -51,12 +59,43 @@ VENDOR_CATEGORIES = [
     "Lighting Equipment Rental Bangalore",
 ]
 
-# File names — dated file changes every run, master file accumulates everything
+# File names — dated file changes every run, master file accumulates everything.
+# The parquet file is the canonical master; the xlsx is a human-readable view.
 TODAY = datetime.now().strftime("%d-%b-%Y")
-DATED_FILE  = f"Bangalore_Vendors_{TODAY}.xlsx"
-MASTER_FILE = "Bangalore_Vendors_Master_List.xlsx"
+DATED_FILE     = f"Bangalore_Vendors_{TODAY}.xlsx"
+MASTER_FILE    = "Bangalore_Vendors_Master_List.xlsx"
+MASTER_PARQUET = "Bangalore_Vendors_Master_List.parquet"
+
+# Shard the master xlsx view into per-category files past this size, so a run
+# only rewrites shards that actually gained vendors (EXPORT_XLSX=1 rewrites all)
+SHARD_XLSX_ROWS = 100_000
+
+# Column order for the "All Vendors" sheet (widths below assume this order)
+OUTPUT_COLUMNS = [
+    "Category",
+    "Business Name",
+    "Phone Number (E.164)",
+    "Phone Valid",
+    "Address",
+    "Rating",
+    "Total Reviews",
+    "Website",
+    "Google Maps Link",
+    "Date Collected",
+]
 
-DELAY_BETWEEN_REQUESTS = 1.5
+SERPAPI_URL = "https://serpapi.com/search.json"
+PAGE_OFFSETS = [0, 20, 40]          # 3 pages x 20 results per category
+MAX_CONCURRENT_REQUESTS = 8
+MIN_NEW_RESULT_RATE = 0.25          # skip pages 2-3 once a category's first page
+                                    # is mostly places other categories already returned
+RATE_LIMIT_THRESHOLD = 5            # start pacing once this few requests remain
+MAX_FETCH_ATTEMPTS = 3              # retries on 429, backoff 1s -> 2s -> 4s
+
+# Same-day reruns (retries, debugging) replay responses from disk instead of
+# spending API quota on identical queries
+SERPAPI_CACHE_DIR = ".serpapi_cache"
+SERPAPI_CACHE_TTL = 43200           # 12 hours, in seconds
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s  %(levelname)s  %(message)s")
 log = logging.getLogger(__name__)
@@ -65,22 +104,56 @@ log = logging.getLogger(__name__)
 # ─────────────────────────────────────────────
 # PHONE NUMBER VALIDATION
 # ─────────────────────────────────────────────
+# Everything SerpAPI hands us is an Indian listing, so the default check is a
+# hand-rolled one: 10 digits leading [6-9] for mobiles (which also covers
+# Bangalore's 80 STD code), or a known metro STD prefix for landlines. Set
+# STRICT_PHONE_VALIDATION = True to route misses through phonenumbers instead
+# when spot-checking a batch — it is orders of magnitude slower.
+STRICT_PHONE_VALIDATION = False
+
+_FAST_PHONE_RE = re.compile(r"^[6-9]\d{9}$")
+_DIGITS_RE = re.compile(r"\D")
+_LANDLINE_STD_PREFIXES = ("11", "20", "22", "33", "40", "44", "79", "80")
+_VALID_TYPES = frozenset({
+    phonenumbers.PhoneNumberType.MOBILE,
+    phonenumbers.PhoneNumberType.FIXED_LINE,
+    phonenumbers.PhoneNumberType.FIXED_LINE_OR_MOBILE,
+})
+
+# Trigger phonenumbers' lazy IN metadata load once at import, not inside the
+# first validation call
+phonenumbers.parse("+919876543210", "IN")
+
+
 def validate_phone(raw: Optional[str]) -> Optional[str]:
     """Returns E.164 Indian phone number or None if invalid."""
-    if not raw:
+    if not raw or not isinstance(raw, str):
         return None
-    cleaned = re.sub(r"[^\d+]", "", raw)
-    for candidate in [cleaned, f"+91{cleaned.lstrip('0')}"]:
+    # Collapse formatting variants ("+91 98765 43210", "098765 43210",
+    # "9876543210") to the last 10 digits so listings that share a number —
+    # franchises, chains — all hit the same cache entry.
+    return _validate_phone_cached(_DIGITS_RE.sub("", raw)[-10:])
+
+
+@functools.lru_cache(maxsize=4096)
+def _validate_phone_cached(digits: str) -> Optional[str]:
+    if not digits:
+        return None
+    if _FAST_PHONE_RE.match(digits):
+        return "+91" + digits
+    if STRICT_PHONE_VALIDATION:
+        return _validate_phone_strict(digits)
+    if len(digits) == 10 and digits.startswith(_LANDLINE_STD_PREFIXES):
+        return "+91" + digits
+    return None
+
+
+def _validate_phone_strict(digits: str) -> Optional[str]:
+    for candidate in [digits, f"+91{digits}"]:
         try:
             parsed = phonenumbers.parse(candidate, "IN")
             if phonenumbers.is_valid_number(parsed):
-                t = phonenumbers.number_type(parsed)
-                valid_types = {
-                    phonenumbers.PhoneNumberType.MOBILE,
-                    phonenumbers.PhoneNumberType.FIXED_LINE,
-                    phonenumbers.PhoneNumberType.FIXED_LINE_OR_MOBILE,
-                }
-                if t in valid_types:
+                if phonenumbers.number_type(parsed) in _VALID_TYPES:
                     return phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.E164)
         except phonenumbers.NumberParseException:
             continue
@@ -90,103 +163,276 @@ def validate_phone(raw: Optional[str]) -> Optional[str]:
 # ─────────────────────────────────────────────
 # SERPAPI DATA FETCHING
 # ─────────────────────────────────────────────
-def search_category(category: str) -> list:
-    """Fetches up to 60 results (3 pages x 20) for one category."""
-    all_results = []
-
-    for start in [0, 20, 40]:
-        params = {
-            "engine": "google_maps",
-            "q": category,
-            "ll": f"@{BANGALORE_COORDS},14z",
-            "type": "search",
-            "start": start,
-            "api_key": SERPAPI_KEY,
-        }
+class RateLimiter:
+    """Paces requests from SerpAPI rate-limit headers instead of a fixed sleep.
+
+    Only sleeps when the remaining-request budget runs low, spreading the
+    leftover budget evenly across the time until the quota resets.
+    """
+
+    def __init__(self, threshold: int = RATE_LIMIT_THRESHOLD):
+        self.threshold = threshold
+        self.remaining: Optional[int] = None
+        self.reset_at: Optional[float] = None
+
+    async def wait(self) -> None:
+        if self.remaining is None or self.remaining >= self.threshold:
+            return
+        if self.reset_at is None:
+            return
+        delay = max(0.0, self.reset_at - time.time()) / max(self.remaining, 1)
+        if delay > 0:
+            log.info(f"  Rate limit low ({self.remaining} left) — pacing {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    def update(self, headers) -> None:
         try:
-            search = GoogleSearch(params)
-            results = search.get_dict()
-            local_results = results.get("local_results", [])
+            self.remaining = int(headers["X-RateLimit-Remaining"])
+        except (KeyError, ValueError):
+            pass
+        try:
+            self.reset_at = time.time() + int(headers["X-RateLimit-Reset"])
+        except (KeyError, ValueError):
+            pass
 
-            if not local_results:
-                log.info(f"  No more results at page offset {start}")
-                break
 
-            all_results.extend(local_results)
-            log.info(f"  Page offset {start}: {len(local_results)} results")
-            time.sleep(DELAY_BETWEEN_REQUESTS)
+def _build_params(category: str, start: int) -> dict:
+    return {
+        "engine": "google_maps",
+        "q": category,
+        "ll": f"@{BANGALORE_COORDS},14z",
+        "type": "search",
+        "start": start,
+        "api_key": SERPAPI_KEY,
+    }
+
+
+_serpapi_cache = diskcache.Cache(SERPAPI_CACHE_DIR)
+
+
+def _cache_key(params: dict) -> str:
+    """Stable key for one request: the params (minus api_key) plus the run date."""
+    keyed = {k: v for k, v in params.items() if k != "api_key"}
+    keyed["date"] = TODAY
+    return hashlib.sha1(json.dumps(keyed, sort_keys=True).encode()).hexdigest()
+
+
+async def fetch_page(
+    session: aiohttp.ClientSession,
+    sem: asyncio.Semaphore,
+    limiter: RateLimiter,
+    category: str,
+    start: int,
+) -> list:
+    """Fetches one results page (20 places) for one category."""
+    params = _build_params(category, start)
+    key = _cache_key(params)
+    results = _serpapi_cache.get(key)
+    if results is not None:
+        local_results = results.get("local_results", [])
+        log.info(f"  {category}: page offset {start}: {len(local_results)} results (cached)")
+        return local_results
+
+    for attempt in range(MAX_FETCH_ATTEMPTS):
+        try:
+            async with sem:
+                await limiter.wait()
+                async with session.get(SERPAPI_URL, params=params) as resp:
+                    limiter.update(resp.headers)
+                    if resp.status == 429:
+                        backoff = int(resp.headers.get("Retry-After", 2 ** attempt))
+                        log.warning(f"  429 for {category} at offset {start} — retrying in {backoff}s")
+                        await asyncio.sleep(backoff)
+                        continue
+                    if resp.status >= 500:
+                        log.warning(f"  {resp.status} for {category} at offset {start} — retrying in {2 ** attempt}s")
+                        await asyncio.sleep(2 ** attempt)
+                        continue
+                    results = orjson.loads(await resp.read())
+
+            _serpapi_cache.set(key, results, expire=SERPAPI_CACHE_TTL)
+            local_results = results.get("local_results", [])
+            if not local_results:
+                log.info(f"  {category}: no results at page offset {start}")
+            else:
+                log.info(f"  {category}: page offset {start}: {len(local_results)} results")
+            return local_results
 
         except Exception as e:
-            log.warning(f"  SerpAPI error at offset {start}: {e}")
-            break
+            log.warning(f"  SerpAPI error for {category} at offset {start}: {e}")
+            await asyncio.sleep(2 ** attempt)
+
+    log.warning(f"  Giving up on {category} at offset {start} after {MAX_FETCH_ATTEMPTS} attempts")
+    return []
+
+
+def _place_id(place: dict) -> Optional[str]:
+    return place.get("place_id") or place.get("data_id")
+
 
-    return all_results
+async def search_all_categories(
+    session: aiohttp.ClientSession, sem: asyncio.Semaphore, limiter: RateLimiter
+) -> dict:
+    """Fetches up to 60 results (3 pages x 20) per category, in two phases.
+
+    Phase 1 pulls every category's first page and tracks place_ids in a Bloom
+    filter; overlapping categories ("Wedding Decorators" vs "Event Planners")
+    largely return places another category already covered, so pages 2-3 are
+    only scheduled where the first page was mostly new.
+    """
+    first_pages = await asyncio.gather(
+        *[fetch_page(session, sem, limiter, category, 0) for category in VENDOR_CATEGORIES]
+    )
+
+    seen = ScalableBloomFilter(mode=ScalableBloomFilter.SMALL_SET_GROWTH)
+    places_by_category = {}
+    deep_categories = []
+    for category, page in zip(VENDOR_CATEGORIES, first_pages):
+        places_by_category[category] = list(page)
+        unseen = 0
+        for place in page:
+            pid = _place_id(place)
+            if pid is not None and pid not in seen:
+                seen.add(pid)
+                unseen += 1
+        if not page:
+            continue
+        new_rate = unseen / 20
+        if new_rate >= MIN_NEW_RESULT_RATE:
+            deep_categories.append(category)
+        else:
+            log.info(f"  {category}: only {unseen} unseen places on page 1 — skipping deeper pages")
+
+    deep_requests = [(category, start) for category in deep_categories for start in PAGE_OFFSETS[1:]]
+    deeper_pages = await asyncio.gather(
+        *[fetch_page(session, sem, limiter, category, start) for category, start in deep_requests]
+    )
+    for (category, _), page in zip(deep_requests, deeper_pages):
+        places_by_category[category].extend(page)
+
+    return places_by_category
 
 
 # ─────────────────────────────────────────────
 # RECORD EXTRACTION
 # ─────────────────────────────────────────────
-def extract_record(place: dict, category: str) -> Optional[dict]:
-    """Parses one SerpAPI result. Returns None for permanently closed."""
-    if place.get("permanently_closed") or "permanently closed" in str(place.get("status", "")).lower():
-        return None
+def extract_records(raw_df: pd.DataFrame) -> pd.DataFrame:
+    """Parses all SerpAPI results in one columnar pass. Drops permanently closed."""
 
-    raw_phone = place.get("phone")
-    validated_phone = validate_phone(raw_phone)
-    website = place.get("website") or place.get("links", {}).get("website", "N/A")
+    def col(name, default=None):
+        if name in raw_df.columns:
+            return raw_df[name]
+        return pd.Series(default, index=raw_df.index)
 
-    return {
-        "Category":             category.replace(" Bangalore", "").strip(),
-        "Business Name":        place.get("title", "N/A"),
-        "Phone Number (E.164)": validated_phone or "Not Available",
-        "Phone Valid":          "Yes" if validated_phone else "No",
-        "Address":              place.get("address", "N/A"),
-        "Rating":               place.get("rating", "N/A"),
-        "Total Reviews":        place.get("reviews", 0),
-        "Website":              website if website else "N/A",
-        "Google Maps Link":     place.get("link", "N/A"),
-        "Date Collected":       TODAY,
-    }
+    closed = col("permanently_closed", False).fillna(False).astype(bool)
+    closed |= col("status", "").fillna("").astype(str).str.lower().str.contains(
+        "permanently closed", regex=False
+    )
+    raw_df = raw_df[~closed]
+
+    out = pd.DataFrame(index=raw_df.index)
+    out["Category"]         = raw_df["_category"].str.replace(" Bangalore", "", regex=False).str.strip()
+    out["Business Name"]    = col("title").fillna("N/A")
+    out["raw_phone"]        = col("phone")
+    out["Address"]          = col("address").fillna("N/A")
+    # Rating stays numeric (NaN when unrated) so the parquet master keeps a
+    # clean float column; the xlsx view substitutes "N/A" at render time
+    out["Rating"]           = pd.to_numeric(col("rating"), errors="coerce")
+    out["Total Reviews"]    = pd.to_numeric(col("reviews"), errors="coerce").fillna(0)
+    out["Website"]          = col("website").fillna(col("links.website")).fillna("N/A")
+    out["Google Maps Link"] = col("link").fillna("N/A")
+    out["Date Collected"]   = TODAY
+    return out.reset_index(drop=True)
 
 
 # ─────────────────────────────────────────────
 # DEDUPLICATION
 # ─────────────────────────────────────────────
+@functools.lru_cache(maxsize=4)
+def _load_master_cached(path: str, mtime: float) -> pd.DataFrame:
+    # mtime is part of the key, so a rewritten master invalidates the entry
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    df = pd.read_excel(path, sheet_name="All Vendors")
+    # Legacy xlsx masters mix "N/A" strings into the numeric columns; coerce
+    # them back so concat + to_parquet keep clean float columns
+    for numeric_col in ("Rating", "Total Reviews"):
+        if numeric_col in df.columns:
+            df[numeric_col] = pd.to_numeric(df[numeric_col], errors="coerce")
+    return df
+
+
 def load_existing_master() -> pd.DataFrame:
-    """Loads existing master file if it exists, else returns empty DataFrame."""
-    if os.path.exists(MASTER_FILE):
+    """Loads the existing master (parquet, falling back to xlsx), else empty DataFrame.
+
+    Reads are memoized on (path, mtime) so repeated calls in a long-lived
+    process (e.g. a scheduled in-process job) skip the file parse entirely.
+    """
+    # xlsx fallback covers masters written before the parquet switch
+    for path in (MASTER_PARQUET, MASTER_FILE):
+        if not os.path.exists(path):
+            continue
         try:
-            df = pd.read_excel(MASTER_FILE, sheet_name="All Vendors")
-            log.info(f"Loaded existing master file: {len(df)} existing vendors")
-            return df
+            df = _load_master_cached(path, os.path.getmtime(path))
+            log.info(f"Loaded existing master ({path}): {len(df)} existing vendors")
+            # Hand out a copy — callers mutate and concat onto this frame, and
+            # the cached original must stay pristine
+            return df.copy()
         except Exception as e:
-            log.warning(f"Could not read master file: {e}. Starting fresh.")
+            log.warning(f"Could not read master {path}: {e}.")
     return pd.DataFrame()
 
 
+def _key_hash(s: str) -> int:
+    # Masked to 53 bits so the value survives an xlsx round-trip (Excel
+    # stores numbers as float64); collision odds stay negligible at our scale.
+    return int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "little") & (
+        (1 << 53) - 1
+    )
+
+
+def ensure_key_column(df: pd.DataFrame) -> pd.DataFrame:
+    """Adds the normalized name/address columns and the _k dedup-key hash if missing.
+
+    _name_norm and _addr_norm persist with the master alongside _k, so reruns
+    never re-normalize the existing side and a future fuzzy-dedup pass
+    (MinHash over _name_norm) can reuse them without re-scanning.
+    """
+    # fillna before astype: legacy xlsx masters carry missing names/addresses
+    # (and footer rows), and astype(str) passes NaN through rather than
+    # stringifying it — a float NaN would blow up inside _key_hash
+    if "_name_norm" not in df.columns:
+        df["_name_norm"] = df["Business Name"].fillna("").astype(str).str.lower().str.strip()
+    if "_addr_norm" not in df.columns:
+        df["_addr_norm"] = df["Address"].fillna("").astype(str).str.lower().str.strip()
+    if "_k" not in df.columns:
+        df["_k"] = (df["_name_norm"] + "||" + df["_addr_norm"]).map(_key_hash)
+    return df
+
+
 def deduplicate(new_df: pd.DataFrame, existing_df: pd.DataFrame) -> tuple[pd.DataFrame, int, int]:
     """
     Removes vendors from new_df that already exist in existing_df.
-    Duplicate = same Business Name + same Address.
+    Duplicate = same Business Name + same Address (compared via _k hash).
     Returns (new_only_df, new_count, duplicate_count).
     """
+    ensure_key_column(new_df)
     if existing_df.empty:
         return new_df, len(new_df), 0
 
-    # Create a unique key from name + address (lowercase, stripped)
-    def make_key(df):
-        return (
-            df["Business Name"].str.lower().str.strip()
-            + "||"
-            + df["Address"].str.lower().str.strip()
-        )
+    ensure_key_column(existing_df)
 
-    existing_keys = set(make_key(existing_df))
-    new_keys = make_key(new_df)
-    is_new = ~new_keys.isin(existing_keys)
+    # Sorted int64 membership test — C-level searchsorted, no Python compares
+    existing = np.sort(existing_df["_k"].dropna().to_numpy(np.int64))
+    if len(existing) == 0:
+        return new_df, len(new_df), 0
+    new = new_df["_k"].to_numpy(np.int64)
+    pos = np.searchsorted(existing, new)
+    clipped = np.clip(pos, 0, len(existing) - 1)
+    is_new = (pos == len(existing)) | (existing[clipped] != new)
 
     new_only = new_df[is_new].reset_index(drop=True)
-    duplicate_count = (~is_new).sum()
+    duplicate_count = int((~is_new).sum())
 
     return new_only, len(new_only), duplicate_count
 
@@ -194,144 +440,225 @@ def deduplicate(new_df: pd.DataFrame, existing_df: pd.DataFrame) -> tuple[pd.Dat
 # ─────────────────────────────────────────────
 # MAIN COLLECTION PIPELINE
 # ─────────────────────────────────────────────
-def collect_all_vendors() -> pd.DataFrame:
-    all_records = []
-
-    for category in VENDOR_CATEGORIES:
-        log.info(f"\nSearching: {category}")
-        places = search_category(category)
-        valid = 0
-
-        for place in places:
-            record = extract_record(place, category)
-            if record:
-                all_records.append(record)
-                valid += 1
+async def collect_all_vendors(session: aiohttp.ClientSession) -> pd.DataFrame:
+    sem = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    limiter = RateLimiter()
+    log.info(f"\nSearching {len(VENDOR_CATEGORIES)} categories concurrently...")
+    places_by_category = await search_all_categories(session, sem, limiter)
+
+    places = [place for page in places_by_category.values() for place in page]
+    if not places:
+        return pd.DataFrame()
+
+    # Normalize the fetched places as-is and attach the category as one
+    # repeated column — no per-place dict copy, so the raw JSON is held once.
+    raw_df = pd.json_normalize(places)
+    raw_df["_category"] = np.repeat(
+        list(places_by_category.keys()),
+        [len(page) for page in places_by_category.values()],
+    )
+    df = extract_records(raw_df)
+    for category, count in df["Category"].value_counts().items():
+        log.info(f"  {category}: {count} valid vendors found")
 
-        log.info(f"  {valid} valid vendors found")
+    log.info(f"\nTotal vendors this run: {len(df)}")
+    if df.empty:
+        return df
 
-    log.info(f"\nTotal vendors this run: {len(all_records)}")
-    return pd.DataFrame(all_records)
+    # Phone validation runs as one cached pass over the column — duplicated
+    # numbers (franchises, shared listings) only pay for one parse.
+    validated = df["raw_phone"].map(validate_phone)
+    df["Phone Number (E.164)"] = validated.fillna("Not Available")
+    df["Phone Valid"] = validated.notna().map({True: "Yes", False: "No"})
+    return df[OUTPUT_COLUMNS]
 
 
 # ─────────────────────────────────────────────
 # EXCEL EXPORT
 # ─────────────────────────────────────────────
-def export_to_excel(df: pd.DataFrame, filepath: str, label: str) -> None:
+def export_to_excel(
+    df: pd.DataFrame,
+    filepath: str,
+    label: str,
+    shard_by: Optional[str] = None,
+    only_shards: Optional[set] = None,
+) -> None:
     if df.empty:
         log.warning(f"No data to export for {label}.")
         return
 
+    if shard_by is not None:
+        for shard, sub in df.groupby(shard_by):
+            if only_shards is not None and shard not in only_shards:
+                continue
+            shard_path = filepath.replace(".xlsx", f"_{shard}.xlsx")
+            _write_workbook(sub.reset_index(drop=True), shard_path, f"{label} [{shard}]")
+        return
+
+    _write_workbook(df, filepath, label)
+
+
+def _write_workbook(df: pd.DataFrame, filepath: str, label: str) -> None:
+    # Convert once, then aggregate with plain C-path reductions — no per-group
+    # Python lambdas. The helper columns live on a copy and never get written.
     summary = (
-        df.groupby("Category")
+        df.assign(
+            _phone_ok=df["Phone Valid"].eq("Yes"),
+            _rating_num=pd.to_numeric(df["Rating"], errors="coerce"),
+        )
+        .groupby("Category")
         .agg(
             Total_Vendors=("Business Name", "count"),
-            Valid_Phones=("Phone Valid", lambda x: (x == "Yes").sum()),
-            Avg_Rating=("Rating", lambda x: pd.to_numeric(x, errors="coerce").mean()),
+            Valid_Phones=("_phone_ok", "sum"),
+            Avg_Rating=("_rating_num", "mean"),
             Total_Reviews=("Total Reviews", "sum"),
         )
         .reset_index()
     )
     summary.columns = ["Category", "Total Vendors", "Valid Phones", "Avg Rating", "Total Reviews"]
 
-    with pd.ExcelWriter(filepath, engine="openpyxl") as writer:
-        df.to_excel(writer, sheet_name="All Vendors", index=False)
+    # Write to a temp file and rename into place — a crash mid-export can
+    # never leave a half-written (unreadable) workbook behind. The temp name
+    # keeps the .xlsx suffix because ExcelWriter validates the extension.
+    base, ext = os.path.splitext(filepath)
+    tmp_path = f"{base}.tmp{ext}"
+    with pd.ExcelWriter(
+        tmp_path,
+        engine="xlsxwriter",
+        engine_kwargs={"options": {"strings_to_urls": False, "nan_inf_to_errors": True}},
+    ) as writer:
+        # Sheet-only copy: unrated vendors show the usual "N/A" while the
+        # DataFrame (and the parquet master) keeps Rating as a float column
+        sheet_df = df.copy()
+        if "Rating" in sheet_df.columns:
+            rating = sheet_df["Rating"]
+            sheet_df["Rating"] = np.where(rating.notna(), rating, "N/A")
+        sheet_df.to_excel(writer, sheet_name="All Vendors", index=False)
         summary.to_excel(writer, sheet_name="Summary", index=False)
+        fmts = _build_formats(writer.book)
+        _format_vendors_sheet(writer.book, writer.sheets["All Vendors"], sheet_df, fmts)
+        _format_summary_sheet(writer.book, writer.sheets["Summary"], summary, fmts)
 
-    wb = load_workbook(filepath)
-    _format_vendors_sheet(wb["All Vendors"])
-    _format_summary_sheet(wb["Summary"], len(summary))
-    wb.save(filepath)
-
+    os.replace(tmp_path, filepath)
     log.info(f"Saved {label}: {filepath}  ({len(df)} vendors)")
 
 
 # ── Styling helpers ────────────────────────────────────────────────────────────
-def _thin_border(color="D0D0D0"):
-    s = Side(style="thin", color=color)
-    return Border(left=s, right=s, top=s, bottom=s)
-
-def _apply_header(cell, bg="1F3864"):
-    cell.font = Font(name="Arial", bold=True, color="FFFFFF", size=11)
-    cell.fill = PatternFill("solid", start_color=bg)
-    cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-    cell.border = _thin_border("FFFFFF")
-
-def _apply_data(cell, row_idx):
-    bg = "EBF0FA" if row_idx % 2 == 0 else "FFFFFF"
-    cell.font = Font(name="Arial", size=10)
-    cell.fill = PatternFill("solid", start_color=bg)
-    cell.alignment = Alignment(vertical="center", wrap_text=True)
-    cell.border = _thin_border()
-
-def _format_vendors_sheet(ws):
-    widths = {"A": 22, "B": 35, "C": 20, "D": 12, "E": 45, "F": 9, "G": 14, "H": 32, "I": 35, "J": 16}
-    for col, w in widths.items():
-        ws.column_dimensions[col].width = w
-
-    ws.row_dimensions[1].height = 30
-    for cell in ws[1]:
-        _apply_header(cell)
-
-    for row_idx, row in enumerate(ws.iter_rows(min_row=2), start=2):
-        ws.row_dimensions[row_idx].height = 20
-        for cell in row:
-            _apply_data(cell, row_idx)
-            if cell.column == 4:
-                if cell.value == "Yes":
-                    cell.font = Font(name="Arial", size=10, color="006100", bold=True)
-                    cell.fill = PatternFill("solid", start_color="C6EFCE")
-                elif cell.value == "No":
-                    cell.font = Font(name="Arial", size=10, color="9C0006", bold=True)
-                    cell.fill = PatternFill("solid", start_color="FFC7CE")
-
-    ws.freeze_panes = "A2"
-    ws.auto_filter.ref = ws.dimensions
-
-    last = ws.max_row + 2
-    for col, val in [(1, "TOTAL VENDORS"), (2, f"=COUNTA(B2:B{ws.max_row - 1})")]:
-        c = ws.cell(row=last, column=col, value=val)
-        c.font = Font(name="Arial", bold=True, size=11, color="FFFFFF")
-        c.fill = PatternFill("solid", start_color="1F3864")
-        c.alignment = Alignment(horizontal="center")
-
-def _format_summary_sheet(ws, data_rows):
-    for col, w in [("A", 28), ("B", 16), ("C", 14), ("D", 12), ("E", 16)]:
-        ws.column_dimensions[col].width = w
-
-    ws.row_dimensions[1].height = 30
-    for cell in ws[1]:
-        _apply_header(cell)
-
-    for row_idx, row in enumerate(ws.iter_rows(min_row=2), start=2):
-        ws.row_dimensions[row_idx].height = 20
-        for cell in row:
-            _apply_data(cell, row_idx)
-            if cell.column == 4 and isinstance(cell.value, float):
-                cell.number_format = "0.00"
-
-    end = data_rows + 1
-    last = end + 2
-    for col, val in [
-        (1, "GRAND TOTAL"),
-        (2, f"=SUM(B2:B{end})"),
-        (3, f"=SUM(C2:C{end})"),
-        (4, f"=IFERROR(AVERAGE(D2:D{end}),0)"),
-        (5, f"=SUM(E2:E{end})"),
-    ]:
-        c = ws.cell(row=last, column=col, value=val)
-        c.font = Font(name="Arial", bold=True, color="FFFFFF")
-        c.fill = PatternFill("solid", start_color="2E75B6")
-        c.alignment = Alignment(horizontal="center")
-        if col == 4:
-            c.number_format = "0.00"
-
-    ws.freeze_panes = "A2"
+# Format specs are module-level constants; each workbook materializes every
+# Format exactly once in _build_formats and rows share them by reference.
+_HEADER_SPEC = {
+    "font_name": "Arial", "bold": True, "font_color": "FFFFFF", "font_size": 11,
+    "bg_color": "1F3864", "align": "center", "valign": "vcenter", "text_wrap": True,
+    "border": 1, "border_color": "FFFFFF",
+}
+_DATA_SPEC = {
+    "font_name": "Arial", "font_size": 10,
+    "valign": "vcenter", "text_wrap": True,
+    "border": 1, "border_color": "D0D0D0",
+}
+_EVEN_BG = "EBF0FA"
+_ODD_BG = "FFFFFF"
+
+def _build_formats(wb):
+    return {
+        "header":   wb.add_format(_HEADER_SPEC),
+        "data":     wb.add_format({**_DATA_SPEC, "bg_color": _ODD_BG}),
+        "data_avg": wb.add_format({**_DATA_SPEC, "bg_color": _ODD_BG, "num_format": "0.00"}),
+        # Fill-only overlay for the banding conditional format; everything
+        # else (font, border) comes from the column format underneath
+        "band":     wb.add_format({"bg_color": _EVEN_BG}),
+    }
+
+def _format_vendors_sheet(wb, ws, df, fmts):
+    # One set_column per column carries width + the shared data format; the
+    # values written by to_excel pick it up without any per-row rewrite.
+    widths = [22, 35, 20, 12, 45, 9, 14, 32, 35, 16]
+    for col_idx, w in enumerate(widths):
+        ws.set_column(col_idx, col_idx, w, fmts["data"])
+
+    # Dedup helper columns (_name_norm, _addr_norm, _k) ride along past column
+    # J so the next run can skip re-normalizing and re-hashing the master —
+    # keep them out of the human view.
+    if len(df.columns) > len(widths):
+        ws.set_column(len(widths), len(df.columns) - 1, None, fmts["data"], {"hidden": True})
+
+    ws.set_default_row(20)
+    ws.set_row(0, 30)
+    for col_idx, name in enumerate(df.columns):
+        ws.write(0, col_idx, name, fmts["header"])
+
+    # Row banding and Yes/No phone coloring as whole-range conditional
+    # formats — O(1) calls instead of touching every cell
+    n = len(df) + 1
+    ws.conditional_format(
+        1, 0, n - 1, len(df.columns) - 1,
+        {"type": "formula", "criteria": "=MOD(ROW(),2)=0", "format": fmts["band"]},
+    )
+    yes_fmt = wb.add_format({"font_color": "006100", "bg_color": "C6EFCE", "bold": True})
+    no_fmt = wb.add_format({"font_color": "9C0006", "bg_color": "FFC7CE", "bold": True})
+    ws.conditional_format(f"D2:D{n}", {"type": "cell", "criteria": "==", "value": '"Yes"', "format": yes_fmt})
+    ws.conditional_format(f"D2:D{n}", {"type": "cell", "criteria": "==", "value": '"No"', "format": no_fmt})
+
+    ws.freeze_panes(1, 0)
+    ws.autofilter(0, 0, len(df), len(df.columns) - 1)
+
+    total_fmt = wb.add_format({
+        "font_name": "Arial", "bold": True, "font_size": 11,
+        "font_color": "FFFFFF", "bg_color": "1F3864", "align": "center",
+    })
+    last = len(df) + 2
+    ws.write(last, 0, "TOTAL VENDORS", total_fmt)
+    ws.write_formula(last, 1, f"=COUNTA(B2:B{len(df)})", total_fmt)
+
+def _format_summary_sheet(wb, ws, summary, fmts):
+    for col_idx, w in enumerate([28, 16, 14, 12, 16]):
+        fmt = fmts["data_avg"] if col_idx == 3 else fmts["data"]
+        ws.set_column(col_idx, col_idx, w, fmt)
+
+    ws.set_default_row(20)
+    ws.set_row(0, 30)
+    for col_idx, name in enumerate(summary.columns):
+        ws.write(0, col_idx, name, fmts["header"])
+
+    ws.conditional_format(
+        1, 0, len(summary), len(summary.columns) - 1,
+        {"type": "formula", "criteria": "=MOD(ROW(),2)=0", "format": fmts["band"]},
+    )
+
+    end = len(summary) + 1
+    grand_fmt = wb.add_format({
+        "font_name": "Arial", "bold": True, "font_color": "FFFFFF",
+        "bg_color": "2E75B6", "align": "center",
+    })
+    grand_avg_fmt = wb.add_format({
+        "font_name": "Arial", "bold": True, "font_color": "FFFFFF",
+        "bg_color": "2E75B6", "align": "center", "num_format": "0.00",
+    })
+    last = end + 1
+    ws.write(last, 0, "GRAND TOTAL", grand_fmt)
+    ws.write_formula(last, 1, f"=SUM(B2:B{end})", grand_fmt)
+    ws.write_formula(last, 2, f"=SUM(C2:C{end})", grand_fmt)
+    ws.write_formula(last, 3, f"=IFERROR(AVERAGE(D2:D{end}),0)", grand_avg_fmt)
+    ws.write_formula(last, 4, f"=SUM(E2:E{end})", grand_fmt)
+
+    ws.freeze_panes(1, 0)
 
 
 # ─────────────────────────────────────────────
 # ENTRY POINT
 # ─────────────────────────────────────────────
+async def _run_collection() -> pd.DataFrame:
+    # One session for the whole run: TLS handshakes and DNS lookups happen
+    # once per connection, not once per request
+    connector = aiohttp.TCPConnector(
+        limit_per_host=MAX_CONCURRENT_REQUESTS,
+        keepalive_timeout=75,
+        ttl_dns_cache=300,
+    )
+    async with aiohttp.ClientSession(connector=connector) as session:
+        return await collect_all_vendors(session)
+
+
 def main():
     if SERPAPI_KEY == "YOUR_SERPAPI_KEY_HERE":
         raise ValueError(
@@ -347,7 +674,7 @@ def main():
     log.info("=" * 55)
 
     # Step 1 — Collect fresh data from SerpAPI
-    new_df = collect_all_vendors()
+    new_df = asyncio.run(_run_collection())
 
     if new_df.empty:
         log.warning("No vendors collected. Check your API key.")
@@ -362,13 +689,7 @@ def main():
     log.info(f"  Already in master: {dup_count}  (skipped)")
     log.info(f"  Genuinely new    : {new_count}  (added)")
 
-    # Step 3 — Save DATED file (only this run's new vendors)
-    if not new_only_df.empty:
-        export_to_excel(new_only_df, DATED_FILE, "Dated file (new vendors only)")
-    else:
-        log.info(f"\nNo new vendors found — dated file not created (nothing new to save)")
-
-    # Step 4 — Update MASTER file (all runs combined)
+    # Step 3 — Update MASTER file (all runs combined)
     if not existing_df.empty and not new_only_df.empty:
         combined_df = pd.concat([existing_df, new_only_df], ignore_index=True)
     elif not existing_df.empty:
@@ -376,7 +697,36 @@ def main():
     else:
         combined_df = new_only_df
 
-    export_to_excel(combined_df, MASTER_FILE, "Master file (all time)")
+    # Same temp-then-rename dance as the workbooks: a killed run must never
+    # corrupt the canonical master
+    combined_df.to_parquet(MASTER_PARQUET + ".tmp", compression="zstd")
+    os.replace(MASTER_PARQUET + ".tmp", MASTER_PARQUET)
+    log.info(f"Saved master parquet: {MASTER_PARQUET}  ({len(combined_df)} vendors)")
+
+    # Step 4 — Excel exports. The dated file (only this run's new vendors) and
+    # the master view are independent, and xlsxwriter is CPU-bound, so they
+    # write in parallel processes when both are needed.
+    export_jobs = []
+    if not new_only_df.empty:
+        export_jobs.append((new_only_df, DATED_FILE, "Dated file (new vendors only)", None, None))
+    else:
+        log.info(f"\nNo new vendors found — dated file not created (nothing new to save)")
+
+    # Master xlsx view: one file while small; past SHARD_XLSX_ROWS, split into
+    # per-category shards and rewrite only categories with new vendors.
+    if len(combined_df) < SHARD_XLSX_ROWS:
+        export_jobs.append((combined_df, MASTER_FILE, "Master file (all time)", None, None))
+    else:
+        dirty = None if os.environ.get("EXPORT_XLSX") == "1" else set(new_only_df["Category"].unique())
+        export_jobs.append((combined_df, MASTER_FILE, "Master file (all time)", "Category", dirty))
+
+    if len(export_jobs) == 1:
+        export_to_excel(*export_jobs[0])
+    else:
+        with ProcessPoolExecutor(max_workers=len(export_jobs)) as executor:
+            futures = [executor.submit(export_to_excel, *job) for job in export_jobs]
+            for future in futures:
+                future.result()
 
     log.info("\n" + "=" * 55)
     log.info(f"  DONE!")